@@ -1,20 +1,29 @@
-from dataclasses import dataclass
-from typing import NamedTuple, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple, Dict, List, Tuple, Union, TYPE_CHECKING
 from collections import namedtuple
+import copy
+import functools
+import importlib
 import importlib_metadata
 import re
-import pkg_resources
 import warnings
 import subprocess
 import sys
 
-from queenbee.plugin.plugin import MetaData
+from packaging.requirements import Requirement
+from packaging.version import Version
 
+if TYPE_CHECKING:
+    from queenbee.plugin.plugin import MetaData
 
+
+_CAMEL_RE = re.compile(r'(?<!^)(?=[A-Z])')
+
+
+@functools.lru_cache(maxsize=512)
 def camel_to_snake(name: str) -> str:
     """Change name from CamelCase to snake-case."""
-    return name[0].lower() + \
-        ''.join(['-' + x.lower() if x.isupper() else x for x in name][1:])
+    return _CAMEL_RE.sub('-', name).lower()
 
 
 def name_to_pollination(name: str) -> str:
@@ -27,6 +36,11 @@ def name_to_pollination(name: str) -> str:
         return f'pollination-{name}'
 
 
+# packages that failed to install from PyPI in this process
+_failed_pulls = set()
+
+
+@functools.lru_cache(maxsize=None)
 def import_module(name: str, pull=True):
     """Import a module by name.
 
@@ -34,6 +48,9 @@ def import_module(name: str, pull=True):
     If the module is not installed and pull is set to True it will try to pull the
     package from PyPI.
 
+    Imported modules are cached. If pulling a package from PyPI fails it will not be
+    tried again in the same process.
+
     """
     package_name = name_to_pollination(name).replace('-', '_')
     err_msg = \
@@ -45,20 +62,24 @@ def import_module(name: str, pull=True):
     package_name_segments = package_name.split('_')
     _namespace = package_name_segments[0]
     _name = '_'.join(package_name_segments[1:])
+    module_name = f'{_namespace}.{_name}'
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
     try:
-        namespace = __import__(f'{_namespace}.{_name}')
-        module = getattr(namespace, _name)
+        module = importlib.import_module(module_name)
     except ModuleNotFoundError as e:
-        if not str(e).endswith(f"'{_namespace}.{_name}'".replace('-', '_')):
+        if not str(e).endswith(f"'{module_name}'".replace('-', '_')):
             # it is a module import error but not the one that we are trying to import
             raise ModuleNotFoundError(e)
 
-        if pull:
+        if pull and package_name not in _failed_pulls:
             print(err_msg)
             success = _try_pull_from_pip(package=package_name)
             if success:
                 # try again
                 return import_module(package_name, pull=False)
+            _failed_pulls.add(package_name)
         raise ModuleNotFoundError(
             f'Failed to import \'{package_name}\' locally or from PyPI. '
             f'You can try `pip install {package_name}` manually.\nTo ensure '
@@ -80,39 +101,43 @@ def _try_pull_from_pip(package):
         return False
 
 
+# specifier operators that point to a usable version for a requirement
+_PINNING_OPERATORS = ('==', '===', '~=', '>=')
+
+
+@functools.lru_cache(maxsize=None)
 def get_requirement_version(package_name, dependency_name):
     """Get assigned version to a dependency in package requirements."""
     package_name = package_name.replace('pollination.', 'pollination_')
     package_name = name_to_pollination(package_name)
     dependency_name = dependency_name.replace('_', '-')
     requirements = {}
-    try:
-        req = pkg_resources.get_distribution(package_name).get_metadata('requires.txt')
-    except FileNotFoundError:
-        # try to get it from meta data
-        package_data = importlib_metadata.metadata(package_name)
-        req_dists = package_data.get_all('Requires-Dist') or []
-        for package in req_dists:
-            name, version = package.split(' (')
-            version = \
-                version.replace('=', '').replace('>', '').replace('<', '') \
-                .replace(')', '').strip()
-            requirements[name] = version
-    else:
-        for package in pkg_resources.parse_requirements(req):
-            version = \
-                str(package.specifier).replace('=', '').replace('>', '').replace('<', '')
-            requirements[package.project_name] = version
+    for package in importlib_metadata.requires(package_name) or []:
+        req = Requirement(package)
+        # use the pinned or the minimum version if there are several specifiers
+        specifiers = sorted(
+            req.specifier, key=lambda s: s.operator not in _PINNING_OPERATORS
+        )
+        version = specifiers[0].version if specifiers else ''
+        name = req.name.replace('_', '-')
+        if req.marker is not None and name in requirements:
+            # keep the unconditional requirement over the ones for extras or markers
+            continue
+        requirements[name] = version
 
-    assert dependency_name in requirements, \
-        f'{dependency_name} is not a requirement for {package_name}.'
+    if dependency_name not in requirements:
+        raise KeyError(f'{dependency_name} is not a requirement for {package_name}.')
 
     return requirements[dependency_name]
 
 
+@functools.lru_cache(maxsize=None)
 def get_docker_image_from_dependency(package, dependency, owner, alias=None):
     """Get a docker image id from package information.
 
+    The image id is cached for each set of inputs. The warning for a missing version
+    is only raised the first time.
+
     Arguments:
         package: Name of the package (e.g. pollination-honeybee-radiance)
         dependency: Name of the dependency (e.g. honeybee-radiance)
@@ -128,7 +153,7 @@ def get_docker_image_from_dependency(package, dependency, owner, alias=None):
     try:
         image_version = get_requirement_version(package, dependency)
         image_id = f'{owner}/{image_name}:{image_version}'
-    except (FileNotFoundError, AssertionError) as error:
+    except (FileNotFoundError, KeyError) as error:
         # this should not happen if the package is installed correctly
         # but Python has so many ways to store requirements based on how the package
         # is built and where! It's better to set it to latest instead of failing.
@@ -141,9 +166,19 @@ def get_docker_image_from_dependency(package, dependency, owner, alias=None):
     return image_id
 
 
+@functools.lru_cache(maxsize=None)
+def _dist_metadata(package_name: str):
+    """Get distribution metadata for a normalized package name.
+
+    Reading the metadata parses the PKG-INFO/METADATA file from disk. The result is
+    cached since it doesn't change during the lifetime of the process.
+    """
+    return importlib_metadata.metadata(package_name)
+
+
 def _get_package_readme(package_name: str) -> str:
     package_name = name_to_pollination(package_name).replace('-', '_')
-    package_data = importlib_metadata.metadata(package_name)
+    package_data = _dist_metadata(package_name)
     long_description = package_data.get_payload()
     if not long_description.strip():
         content = package_data.get('Description')
@@ -157,62 +192,64 @@ def _get_package_readme(package_name: str) -> str:
 def _get_package_owner(package_name: str) -> str:
     """Author field is used for package owner."""
     package_name = name_to_pollination(package_name).replace('-', '_')
-    package_data = importlib_metadata.metadata(package_name)
+    package_data = _dist_metadata(package_name)
     owner = package_data.get('Author')
-    assert owner, \
-        'You must set the author of the package in setup.py to Pollination account owner'
+    if not owner:
+        raise ValueError(
+            'You must set the author of the package in setup.py to Pollination account '
+            'owner'
+        )
     # ensure there is only one author
     owner = owner.strip()
-    assert len(owner.split(',')) == 1, \
-        'A Pollination package can only have one author. Use maintainer field for ' \
-        'providing multiple maintainers.'
+    if ',' in owner:
+        raise ValueError(
+            'A Pollination package can only have one author. Use maintainer field for '
+            'providing multiple maintainers.'
+        )
 
     return owner
 
 
-def _get_package_license(package_data: Dict) -> Dict:
+def _get_package_license(headers: Dict) -> Dict:
     # try to get license
-    license_info = package_data.get('License')
+    license_info = headers.get('license')
     if not license_info:
         license, link = None, None
-    elif license_info and ',' in license_info:
-        license, link = [info.strip() for info in license_info.split(',')]
     else:
-        license, link = license_info.strip(), None
+        license, sep, link = license_info.partition(',')
+        license, link = license.strip(), link.strip() if sep else None
 
     return {'name': license, 'url': link}
 
 
-def _get_package_keywords(package_data: Dict) -> List:
-    keywords = package_data.get('Keywords')
+def _get_package_keywords(headers: Dict) -> List:
+    keywords = headers.get('keywords')
     if keywords:
         keywords = [key.strip() for key in keywords.split(',')]
     return keywords
 
 
-def _get_package_sources(package_data: Dict) -> str:
-    urls = package_data.get_all('Project-URL')
+def _get_package_urls(urls: List[str]) -> Tuple[str, List[str]]:
+    """Get package icon and sources from Project-URL values."""
+    icon = None
     sources = []
     for url in urls:
-        key, value = url.split(',')
-        if key == 'icon':
+        key, sep, value = url.partition(',')
+        if not sep:
+            # invalid Project-URL without a label
+            continue
+        if key.strip() == 'icon':
+            if icon is None:
+                icon = value.strip()
             continue
         sources.append(value.strip())
-    return sources
-
-
-def _get_package_icon(package_data: Dict) -> str:
-    urls = package_data.get_all('Project-URL')
-    for url in urls:
-        key, value = url.split(',')
-        if key == 'icon':
-            return value.strip()
+    return icon, sources
 
 
-def _get_package_maintainers(package_data: Dict) -> List[Dict]:
+def _get_package_maintainers(headers: Dict) -> List[Dict]:
     package_maintainers = []
-    maintainer = package_data.get('Maintainer')
-    maintainer_email = package_data.get('Maintainer-email')
+    maintainer = headers.get('maintainer')
+    maintainer_email = headers.get('maintainer-email')
 
     if maintainer:
         maintainers = [m.strip() for m in maintainer.split(',')]
@@ -227,61 +264,122 @@ def _get_package_maintainers(package_data: Dict) -> List[Dict]:
 
 
 def _clean_version(version: str) -> str:
-    """Clean package version."""
-    xyz = [v.strip() for v in version.split('.')]
-
-    if len(xyz) == 2:
-        return f'{xyz[0]}.{xyz[1]}.0'
-
-    x, y, z = xyz[:3]
+    """Clean package version.
 
-    if z == '0':
-        return f'{x}.{y}.{z}'
-
-    # clean up the developer version
-    try:
-        version = f'{x}.{y}.{int(z)}'
-    except ValueError:
-        # development version like 0.1.dev1+gf910655.d20210207
-        version = f'{x}.{y}.0'
-
-    return version
+    The output is always the x.y.z release segment of the version. Development,
+    pre-release, post-release and local parts are removed.
+    """
+    release = Version(version).release
+    x, y, z = (release + (0, 0))[:3]
+    return f'{x}.{y}.{z}'
 
 
-def _get_package_version(package_data: Dict) -> str:
+def _get_package_version(headers: Dict) -> str:
     """Get package version.
 
     This function returns the non-development version for a development version.
     It removes the .dev part and return x.y.z-1 version if it is a dev version.
     """
-    version = package_data.get('Version')
+    version = headers.get('version')
     return _clean_version(version)
 
 
-def _get_package_data(package_name: str) -> Dict:
-    """Get package data as a dictionary."""
-    package_name = name_to_pollination(package_name).replace('-', '_')
-    package_data = importlib_metadata.metadata(package_name)
+def _parse_package_data(package_data) -> Dict:
+    """Parse package data from distribution metadata.
+
+    The metadata headers are read in a single pass. Header names are case-insensitive
+    and only the first value is used for single value headers.
+    """
+    headers = {}
+    urls = []
+    for key, value in package_data.items():
+        key = key.lower()
+        if key == 'project-url':
+            urls.append(value)
+        elif key not in headers:
+            headers[key] = value
+
+    icon, sources = _get_package_urls(urls)
 
     data = {
-        'name': package_data.get('Name').replace('pollination-', ''),
-        'description': package_data.get('Summary'),
-        'home': package_data.get('Home-page'),
-        'tag': _get_package_version(package_data),
-        'keywords': _get_package_keywords(package_data),
-        'maintainers': _get_package_maintainers(package_data),
-        'license': _get_package_license(package_data),
-        'icon': _get_package_icon(package_data),
-        'sources': _get_package_sources(package_data)
+        'name': headers.get('name').replace('pollination-', ''),
+        'description': headers.get('summary'),
+        'home': headers.get('home-page'),
+        'tag': _get_package_version(headers),
+        'keywords': _get_package_keywords(headers),
+        'maintainers': _get_package_maintainers(headers),
+        'license': _get_package_license(headers),
+        'icon': icon,
+        'sources': sources
     }
 
     return data
 
 
-def _get_meta_data(module, package_type: str) -> MetaData:
+@functools.lru_cache(maxsize=1)
+def _dsl_version() -> Union[str, None]:
+    """Get the installed version of pollination-dsl."""
+    try:
+        return importlib_metadata.version('pollination-dsl')
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _load_package_data(package_name: str) -> Dict:
+    """Load package data for a normalized package name.
+
+    Use ``_get_package_data`` instead. The output of this function is cached and
+    must not be edited in place.
+    """
+    return _parse_package_data(_dist_metadata(package_name))
+
+
+def _get_package_data(package_name: str) -> Dict:
+    """Get package data as a dictionary.
+
+    The returned dictionary is a copy and can be safely edited by the caller.
+    """
+    package_name = name_to_pollination(package_name).replace('-', '_')
+    return copy.deepcopy(_load_package_data(package_name))
+
+
+# package data for imported pollination modules by module name
+_module_package_data = {}
+
+
+def _get_module_package_data(module) -> Dict:
+    """Get package data for an imported pollination module.
+
+    The data is calculated once per module so all the functions and DAGs in the same
+    package share the same data. The output is cached and must not be edited in place.
+    """
+    package_data = _module_package_data.get(module.__name__)
+    if package_data is None:
+        package_data = _get_package_data(module.__name__)
+        _module_package_data[module.__name__] = package_data
+    return package_data
+
+
+def _clear_metadata_cache() -> None:
+    """Clear cached package metadata and requirements.
+
+    This is useful when a package is re-installed in the same process and in tests.
+    Functions and DAGs that are already instantiated keep their own cached values.
+    """
+    _dist_metadata.cache_clear()
+    _load_package_data.cache_clear()
+    _module_package_data.clear()
+    get_requirement_version.cache_clear()
+    get_docker_image_from_dependency.cache_clear()
+
+
+def _get_meta_data(module, package_type: str) -> 'MetaData':
     """Get package metadata."""
+    from queenbee.plugin.plugin import MetaData
+
     qb_info = dict(module.__pollination__)
-    package_data = _get_package_data(module.__name__)
+    package_data = _get_module_package_data(module)
 
     if package_type == 'plugin':
         qb_info.pop('config')
@@ -301,16 +399,29 @@ def _get_meta_data(module, package_type: str) -> MetaData:
     return metadata
 
 
+@functools.lru_cache(maxsize=None)
+def _record_type(name: str, fields: tuple) -> type:
+    """Get a namedtuple type for a list of fields.
+
+    Creating a namedtuple type is expensive. Types are cached so Functions and DAGs
+    with the same inputs or outputs reuse the same type.
+    """
+    return namedtuple(name, fields)
+
+
 @dataclass
 class _BaseClass:
     """Base class for Pollination dsl Function and DAG.
 
     Do not use this class directly.
+
+    Subclasses should cache the output of ``queenbee`` in ``_cached_queenbee``. The
+    cached values are per instance fields and they are not used for comparison.
     """
-    _cached_queenbee = None
-    _cached_outputs = None
-    _cached_package = None
-    _cached_inputs = None
+    _cached_queenbee: Any = field(default=None, init=False, repr=False, compare=False)
+    _cached_outputs: Any = field(default=None, init=False, repr=False, compare=False)
+    _cached_package: Any = field(default=None, init=False, repr=False, compare=False)
+    _cached_inputs: Any = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def queenbee(self):
@@ -325,19 +436,20 @@ class _BaseClass:
         The name starts with a _ not to conflict with a possible member of the class
         with the name inputs.
         """
-        if self._cached_inputs:
+        if self._cached_inputs is not None:
             return self._cached_inputs
         cls_name = camel_to_snake(self.__class__.__name__)
+        qb_inputs = self.queenbee.inputs
         mapper = {
             inp.name.replace('-', '_'): {
                 'name': inp.name.replace('-', '_'),
                 'parent': cls_name,
                 'value': inp
-            } for inp in self.queenbee.inputs
+            } for inp in qb_inputs
         }
 
-        inputs = namedtuple('Inputs', list(mapper.keys()))
-        self._cached_inputs = inputs(*list(mapper.values()))
+        inputs = _record_type('Inputs', tuple(mapper))
+        self._cached_inputs = inputs(*mapper.values())
 
         return self._cached_inputs
 
@@ -350,17 +462,18 @@ class _BaseClass:
         The name starts with a _ not to conflict with a possible member of the class
         with the name outputs.
         """
-        if self._cached_outputs:
+        if self._cached_outputs is not None:
             return self._cached_outputs
         cls_name = camel_to_snake(self.__class__.__name__)
+        qb_outputs = self.queenbee.outputs
         mapper = {
             out.name.replace('-', '_'): {
                 'name': out.name.replace('-', '_'),
                 'parent': cls_name, 'value': out
-            } for out in self.queenbee.outputs
+            } for out in qb_outputs
         }
-        outputs = namedtuple('Outputs', list(mapper.keys()))
-        self._cached_outputs = outputs(*list(mapper.values()))
+        outputs = _record_type('Outputs', tuple(mapper))
+        self._cached_outputs = outputs(*mapper.values())
 
         return self._cached_outputs
 
@@ -371,16 +484,18 @@ class _BaseClass:
         This information will only be available if the function is part of a Python
         package.
         """
-        if self._cached_package:
+        if self._cached_package is not None:
             return self._cached_package
 
         module = import_module(self._python_package, pull=True)
-        assert hasattr(module, '__pollination__'), \
-            'Failed to find __pollination__ info in __init__.py'
-        package_data = _get_package_data(module.__name__)
+        if not hasattr(module, '__pollination__'):
+            raise ValueError('Failed to find __pollination__ info in __init__.py')
+        package_data = _get_module_package_data(module)
         pollination_data = getattr(module, '__pollination__')
+        # copy the values so editing the package information doesn't change the
+        # cached package data
         for k, v in package_data.items():
-            pollination_data[k] = v
+            pollination_data[k] = copy.deepcopy(v)
         self._cached_package = pollination_data
         return self._cached_package
 
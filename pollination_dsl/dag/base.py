@@ -3,7 +3,7 @@ import inspect
 
 from queenbee.recipe.dag import DAG as QBDAG
 
-from ..common import _BaseClass
+from ..common import camel_to_snake, _BaseClass
 
 
 @dataclass
@@ -22,22 +22,17 @@ class DAG(_BaseClass):
 
     """
     __decorator__ = 'dag'
-    _cached_queenbee = None
-    _cached_inputs = None
-    _cached_outputs = None
-    _cached_package = None
 
     @property
     def queenbee(self) -> QBDAG:
         """Convert this class to a Queenbee DAG."""
         # cache the DAG since it always stays the same for each instance
-        if self._cached_queenbee:
+        if self._cached_queenbee is not None:
             return self._cached_queenbee
 
         cls = self.__class__
 
-        name = cls.__name__[0].lower() + \
-            ''.join(['-' + x.lower() if x.isupper() else x for x in cls.__name__][1:])
+        name = camel_to_snake(cls.__name__)
 
         # create a mapper for inputs and use it to track back the name of the inputs
         # when creating a task reference by using the id of the assigned item.
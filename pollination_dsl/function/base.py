@@ -1,6 +1,7 @@
 import inspect
 import os
 import subprocess
+import sys
 import tempfile
 
 from dataclasses import dataclass
@@ -30,11 +31,19 @@ class Function(_BaseClass):
     """
     __decorator__ = 'function'
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # register the function in its module so plugins can find their functions
+        # without inspecting every module attribute
+        module = sys.modules.get(cls.__module__)
+        if module is not None:
+            module.__dict__.setdefault('__pollination_functions__', []).append(cls)
+
     @property
     def queenbee(self) -> QBFunction:
         """Convert this class to a Queenbee Function."""
         # cache the Function since it always stays the same for each instance
-        if self._cached_queenbee:
+        if self._cached_queenbee is not None:
             return self._cached_queenbee
 
         cls = self.__class__
@@ -1,6 +1,5 @@
 from typing import Dict, List, Any
 from dataclasses import dataclass
-from pydantic.errors import TupleError
 from queenbee.io.inputs.function import (
     FunctionStringInput, FunctionIntegerInput, FunctionNumberInput,
     FunctionBooleanInput, FunctionFolderInput, FunctionFileInput,
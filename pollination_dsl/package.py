@@ -1,29 +1,34 @@
+import functools
+import hashlib
 import importlib
+import io
+import json
+import importlib_metadata
 import pkgutil
 import pathlib
+import shutil
 import warnings
-from typing import Union
+from typing import Tuple, Union, TYPE_CHECKING
 
-from queenbee.plugin.plugin import Plugin, PluginConfig
-from queenbee.recipe.recipe import Recipe, BakedRecipe, Dependency, DependencyKind
-from queenbee.repository.package import PackageVersion
-from queenbee.repository.index import RepositoryIndex
-from queenbee.config import Config, RepositoryReference
-
-from .function import Function
 from .common import import_module, _get_meta_data, _get_package_readme, \
-    get_requirement_version, name_to_pollination
+    _dsl_version, get_requirement_version, name_to_pollination
+
+# queenbee is imported inside the functions that use it to keep importing
+# pollination_dsl light.
+if TYPE_CHECKING:
+    from queenbee.plugin.plugin import Plugin
+    from queenbee.recipe.recipe import Recipe, BakedRecipe
 
 
+@functools.lru_cache(maxsize=1)
 def _init_repo() -> pathlib.Path:
     """Initiate a local Queenbee repository.
 
     This function is used by package function to start a local Queenbee repository
     if it doesn't exist. If the repository has already been created it will return
-    the path to the repository.
+    the path to the repository. The path is cached after the first call.
     """
-    HOME = pathlib.Path.home().as_posix()
-    path = pathlib.Path(HOME, '.queenbee', 'pollination-dsl')
+    path = pathlib.Path.home() / '.queenbee' / 'pollination-dsl'
     path.mkdir(parents=True, exist_ok=True)
 
     index_file = path/'index.json'
@@ -34,13 +39,14 @@ def _init_repo() -> pathlib.Path:
     recipes_folder.mkdir(exist_ok=True)
 
     if not index_file.exists():
+        from queenbee.repository.index import RepositoryIndex
         index = RepositoryIndex.from_folder(path.as_posix())
         index.to_json(index_file.as_posix(), indent=2)
 
     return path
 
 
-def _load_plugin(module) -> Plugin:
+def _load_plugin(module) -> 'Plugin':
     """Load Queenbee plugin from Python package.
 
     Usually you should not be using this function directly. Use ``load`` function
@@ -52,6 +58,9 @@ def _load_plugin(module) -> Plugin:
     returns:
         Plugin - A Queenbee plugin
     """
+    from queenbee.plugin.plugin import Plugin, PluginConfig
+    from .function import Function
+
     qb_info = module.__pollination__
     package_name = module.__name__
     # get metadata
@@ -60,21 +69,44 @@ def _load_plugin(module) -> Plugin:
 
     folder = pathlib.Path(module.__file__).parent
 
+    modules = [
+        importlib.import_module('.' + name, package_name)
+        for (_, name, _) in pkgutil.iter_modules([folder])
+    ]
+
+    # functions that are defined in these modules are in their registry
+    listed_modules = {module.__name__ for module in modules}
+
     functions = []
-    for (_, name, _) in pkgutil.iter_modules([folder]):
-        module = importlib.import_module('.' + name, package_name)
-        for attr in dir(module):
-            loaded_attr = getattr(module, attr)
-            if hasattr(loaded_attr, '__decorator__') and \
-                    getattr(loaded_attr, '__decorator__') == 'function':
-                if loaded_attr is Function:
-                    continue
+    # the same function can be imported in several submodules
+    seen = set()
+    for module in modules:
+        namespace = vars(module)
+        registered = getattr(module, '__pollination_functions__', [])
+        # skip functions that are created dynamically and are not module attributes
+        candidates = [
+            (func.__name__, func) for func in registered
+            if namespace.get(func.__name__) is func
+        ]
+        # add functions that are imported from modules that are not listed
+        # (e.g. from a nested module) as they are not in any of the registries
+        candidates.extend(
+            (name, attr) for name, attr in namespace.items()
+            if isinstance(attr, type) and issubclass(attr, Function)
+            and attr.__module__ not in listed_modules
+        )
+        # sort by attribute name to keep the order of the functions in the plugin
+        for _, loaded_attr in sorted(candidates, key=lambda item: item[0]):
+            if id(loaded_attr) in seen or loaded_attr is Function:
+                continue
+            if getattr(loaded_attr, '__decorator__', None) == 'function':
+                seen.add(id(loaded_attr))
                 functions.append(loaded_attr().queenbee)
     plugin = Plugin(config=config, metadata=metadata, functions=functions)
     return plugin
 
 
-def package_recipe_dependencies(recipe: Recipe) -> None:
+def package_recipe_dependencies(recipe: 'Recipe') -> None:
     """Try to load/package recipe dependencies from local registry.
 
     If the dependency is not available in local registry then it will try to package
@@ -83,10 +115,105 @@ def package_recipe_dependencies(recipe: Recipe) -> None:
     """
     print(f'packaging dependencies for {recipe.metadata.name}:{recipe.metadata.tag}')
     for dep in recipe.dependencies:
-        package(dep.name)
+        _autoregister(dep.name)
+
+
+def _installation_info(dist_name: str) -> Tuple[Union[list, None], bool]:
+    """Get a key for the installation of a package and check if it is editable.
+
+    The key is calculated from the version of pollination-dsl and the content of the
+    package METADATA and RECORD files. It changes when the package is re-installed
+    or pollination-dsl is upgraded.
+
+    Returns:
+        A tuple with the key and a boolean that is True if the package is installed
+        in editable mode. The key is None if the package is not installed.
+    """
+    try:
+        dist = importlib_metadata.distribution(dist_name)
+    except importlib_metadata.PackageNotFoundError:
+        return None, False
 
+    editable = False
+    direct_url = dist.read_text('direct_url.json')
+    if direct_url:
+        try:
+            editable = bool(json.loads(direct_url).get('dir_info', {}).get('editable'))
+        except (ValueError, AttributeError):
+            pass
 
-def _load_recipe(module, baked: bool = False) -> Union[BakedRecipe, Recipe]:
+    content = hashlib.sha256()
+    for file_name in ('METADATA', 'PKG-INFO', 'RECORD'):
+        text = dist.read_text(file_name)
+        if text:
+            content.update(file_name.encode('utf-8'))
+            content.update(text.encode('utf-8'))
+
+    return [_dsl_version(), content.hexdigest()], editable
+
+
+def _is_registered(sentinel: pathlib.Path, key: list) -> bool:
+    """Check if a sentinel file is valid for the installed package.
+
+    The sentinel is only valid if it is written for the same installation of the
+    package and the packaged file and its index entry still exist in the repository.
+    """
+    try:
+        info = json.loads(sentinel.read_text())
+    except (OSError, ValueError):
+        return False
+    if not isinstance(info, dict) or info.get('key') != key:
+        return False
+    repository_path = _init_repo()
+    url = info.get('url')
+    if not url or not (repository_path/url).is_file():
+        return False
+    try:
+        index = json.loads((repository_path/'index.json').read_text())
+    except (OSError, ValueError):
+        return False
+    return any(
+        version.get('url') == url
+        for qb_type in ('plugin', 'recipe')
+        for versions in (index.get(qb_type) or {}).values()
+        for version in versions
+    )
+
+
+def _autoregister(package_name: str) -> None:
+    """Package a plugin or a recipe to the local repository on first use.
+
+    A sentinel file is written to the repository after packaging so the same
+    installation of the package will not be packaged again by the same version of
+    pollination-dsl as long as the package file and its index entry are still in the
+    repository. Packages that are installed
+    in editable mode are always packaged. Use ``package`` to force packaging.
+
+    args:
+        package_name: Python package name (e.g. pollination-honeybee-radiance).
+    """
+    dist_name = name_to_pollination(package_name).replace('_', '-')
+    sentinel = _init_repo()/'.registered'/f'{dist_name}.json'
+    key, editable = _installation_info(dist_name)
+    if key is not None and not editable and _is_registered(sentinel, key):
+        return
+
+    file_path = package(package_name)
+
+    if key is None:
+        # the package might have been installed from PyPI by package
+        key, editable = _installation_info(dist_name)
+    if key is None or editable:
+        return
+    url = file_path.relative_to(_init_repo()).as_posix()
+    try:
+        sentinel.parent.mkdir(exist_ok=True)
+        sentinel.write_text(json.dumps({'key': key, 'url': url}))
+    except OSError:
+        pass
+
+
+def _load_recipe(module, baked: bool = False) -> Union['BakedRecipe', 'Recipe']:
     # load entry-point DAG
     """Load Queenbee plugin from Python package.
 
@@ -99,12 +226,17 @@ def _load_recipe(module, baked: bool = False) -> Union[BakedRecipe, Recipe]:
     returns:
         Recipe - A Queenbee recipe. It will be a baked recipe if baked is set to True.
     """
+    from queenbee.recipe.recipe import Recipe, BakedRecipe, Dependency, DependencyKind
+    from queenbee.config import Config, RepositoryReference
+
     qb_info = module.__pollination__
     package_name = module.__name__
 
     main_dag_entry = qb_info.get('entry_point', None)
-    assert main_dag_entry, \
-        f'{package_name} __pollination__ info is missing the enetry_point key.'
+    if not main_dag_entry:
+        raise ValueError(
+            f'{package_name} __pollination__ info is missing the entry_point key.'
+        )
 
     main_dag = main_dag_entry()
 
@@ -121,20 +253,21 @@ def _load_recipe(module, baked: bool = False) -> Union[BakedRecipe, Recipe]:
 
     # add dependencies
     repo = _init_repo()
-    plugins = [
+    repo_uri = repo.as_uri()
+    plugin_kind = DependencyKind.plugin
+    recipe_kind = DependencyKind.recipe
+    dependencies = [
         Dependency(
-            kind=DependencyKind.plugin, name=plugin['name'], tag=plugin['tag'],
-            source=repo.as_uri()
+            kind=plugin_kind, name=plugin['name'], tag=plugin['tag'], source=repo_uri
         ) for plugin in _dependencies['plugin']
     ]
-    recipes = [
+    dependencies.extend(
         Dependency(
-            kind=DependencyKind.recipe, name=recipe['name'], tag=recipe['tag'],
-            source=repo.as_uri()
+            kind=recipe_kind, name=recipe['name'], tag=recipe['tag'], source=repo_uri
         ) for recipe in _dependencies['recipe']
-    ]
+    )
 
-    recipe = Recipe(metadata=metadata, dependencies=plugins + recipes, flow=dags)
+    recipe = Recipe(metadata=metadata, dependencies=dependencies, flow=dags)
 
     if baked:
         package_recipe_dependencies(recipe)
@@ -147,7 +280,9 @@ def _load_recipe(module, baked: bool = False) -> Union[BakedRecipe, Recipe]:
     return recipe
 
 
-def load(package_name: str, baked: bool = False) -> Union[Plugin, BakedRecipe, Recipe]:
+def load(
+        package_name: str, baked: bool = False
+        ) -> Union['Plugin', 'BakedRecipe', 'Recipe']:
     """Load Queenbee Plugin or Recipe from Python package.
 
         package_name: Python package name (e.g. honeybee-radiance-pollination)
@@ -155,8 +290,8 @@ def load(package_name: str, baked: bool = False) -> Union[Plugin, BakedRecipe, R
     """
     module = import_module(package_name)
 
-    assert hasattr(module, '__pollination__'), \
-        'Failed to find __pollination__ info in __init__.py'
+    if not hasattr(module, '__pollination__'):
+        raise ValueError('Failed to find __pollination__ info in __init__.py')
     qb_info = getattr(module, '__pollination__')
     if 'config' in qb_info:
         print(f'loading plugin: {package_name}')
@@ -171,7 +306,7 @@ def load(package_name: str, baked: bool = False) -> Union[Plugin, BakedRecipe, R
             name = name_to_pollination(dep.name)
             try:
                 tag = get_requirement_version(package_name, name)
-            except AssertionError:
+            except KeyError:
                 warnings.warn(
                     f'{package_name} has dependencies on {name} but it is not set as '
                     'one of the package dependencies in setup.py. Will use the version '
@@ -187,16 +322,22 @@ def load(package_name: str, baked: bool = False) -> Union[Plugin, BakedRecipe, R
     return package
 
 
-def package(package_name: str, readme: str = None) -> None:
+def package(package_name: str, readme: str = None) -> pathlib.Path:
     """Package a plugin or a recipe and add it to Queenbee local repository.
 
         Args:
             package_name: Python package name (e.g. honeybee-radiance-pollination)
             readme: Readme contents as a string.
+
+        Returns:
+            pathlib.Path -- Path to the package file in the local repository.
     """
+    from queenbee.plugin.plugin import Plugin
+    from queenbee.recipe.recipe import Recipe
+    from queenbee.repository.package import PackageVersion
+
     # init a Queenbee package
     repository_path = _init_repo()
-    index_path = repository_path/'index.json'
     qb_obj = load(package_name, baked=False)
     if isinstance(qb_obj, Recipe):
         qb_type = 'recipe'
@@ -214,14 +355,80 @@ def package(package_name: str, readme: str = None) -> None:
     except Exception as error:
         raise ValueError(f'Failed to package {package_name} {qb_type}\n {error}')
     file_path = repository_path/f'{qb_type}s'/plugin_version.url
-    file_object.seek(0)
-    file_path.write_bytes(file_object.read())
+    if isinstance(file_object, io.BytesIO):
+        # write the in-memory buffer directly without making a copy
+        with file_object.getbuffer() as buffer:
+            file_path.write_bytes(buffer)
+    else:
+        file_object.seek(0)
+        with file_path.open('wb') as dst:
+            shutil.copyfileobj(file_object, dst, length=1 << 16)
+
+    # add the new package to the repository index
+    _index_package(repository_path, file_path, qb_type)
+
+    return file_path
+
+
+def _index_package(
+        repository_path: pathlib.Path, file_path: pathlib.Path, qb_type: str
+        ) -> None:
+    """Add a newly packaged plugin or recipe to the local repository index.
+
+    Only the new package is added to the existing index. The index is rebuilt from the
+    packages in the repository folder if it is missing, can't be loaded or it has
+    entries for package files that don't exist anymore.
+
+    args:
+        repository_path: Path to the local Queenbee repository.
+        file_path: Path to the package file inside the plugins or recipes folder.
+        qb_type: Package type. It should be either plugin or recipe.
+    """
+    from queenbee.repository.index import RepositoryIndex
+    from queenbee.repository.package import PackageVersion
+
+    index_path = repository_path/'index.json'
+    repo_index = None
+    if index_path.is_file():
+        try:
+            repo_index = RepositoryIndex.from_file(index_path.as_posix())
+        except (OSError, ValueError):
+            # invalid index file
+            repo_index = None
+    if repo_index is not None and not _index_files_exist(repository_path, repo_index):
+        repo_index = None
+
+    if repo_index is None:
+        # re-index the whole repository
+        repo_index = RepositoryIndex.from_folder(repository_path.as_posix())
+    else:
+        # read the version from the package file the same way from_folder does so
+        # the digest matches a full re-index
+        package_version = PackageVersion.from_package(file_path.as_posix())
+        package_version.url = f'{qb_type}s/{file_path.name}'
+        if qb_type == 'plugin':
+            repo_index.index_plugin_version(package_version, overwrite=True)
+        else:
+            repo_index.index_recipe_version(package_version, overwrite=True)
+        root = repository_path.name
+        RepositoryIndex.add_slugs(root=root, packages=repo_index.plugin)
+        RepositoryIndex.add_slugs(root=root, packages=repo_index.recipe)
+        repo_index.metadata.plugin_count = len(repo_index.plugin)
+        repo_index.metadata.recipe_count = len(repo_index.recipe)
 
-    # re-index the repository
-    repo_index = RepositoryIndex.from_folder(repository_path)
     repo_index.to_json(index_path.as_posix(), indent=2)
 
 
+def _index_files_exist(repository_path: pathlib.Path, repo_index) -> bool:
+    """Check that all the package files in a repository index exist."""
+    for packages in (repo_index.plugin, repo_index.recipe):
+        for versions in packages.values():
+            for version in versions:
+                if not (repository_path/version.url).is_file():
+                    return False
+    return True
+
+
 def translate(
         package_name: str,
         target_folder: str,
@@ -243,6 +450,8 @@ def translate(
     returns:
         str -- path to the generated folder or file.
     """
+    from queenbee.recipe.recipe import BakedRecipe
+
     qb_object = load(package_name, baked=baked)
     if baked and isinstance(qb_object, BakedRecipe):
         recipe_file = pathlib.Path(target_folder, package_name + '.yaml')
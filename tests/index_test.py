@@ -0,0 +1,76 @@
+from queenbee.plugin.plugin import Plugin
+from queenbee.repository.index import RepositoryIndex
+from queenbee.repository.package import PackageVersion
+
+from pollination_dsl.package import _index_package
+
+
+def _package_plugin(repository_path, tag):
+    plugin = Plugin.parse_obj({
+        'metadata': {'name': 'test-plugin', 'tag': tag},
+        'config': {
+            'docker': {'image': 'ladybugtools/test:0.1.0', 'workdir': '/home/run'}
+        },
+        'functions': [
+            {'name': 'echo', 'command': 'echo hi', 'inputs': [], 'outputs': []}
+        ]
+    })
+    package_version, file_object = PackageVersion.package_resource(plugin)
+    file_path = repository_path/'plugins'/package_version.url
+    file_path.write_bytes(file_object.getvalue())
+    return file_path
+
+
+def test_index_package_matches_full_index(tmp_path):
+    repository_path = tmp_path/'pollination-dsl'
+    (repository_path/'plugins').mkdir(parents=True)
+    (repository_path/'recipes').mkdir()
+    index_path = repository_path/'index.json'
+    RepositoryIndex.from_folder(repository_path.as_posix()) \
+        .to_json(index_path.as_posix(), indent=2)
+
+    for tag in ('0.1.0', '0.2.0'):
+        file_path = _package_plugin(repository_path, tag)
+        _index_package(repository_path, file_path, 'plugin')
+
+    index = RepositoryIndex.from_file(index_path.as_posix())
+    full_index = RepositoryIndex.from_folder(repository_path.as_posix())
+
+    def _versions(repo_index):
+        return sorted(
+            (v.tag, v.url, v.digest, v.slug) for v in repo_index.plugin['test-plugin']
+        )
+
+    assert _versions(index) == _versions(full_index)
+    assert index.metadata.plugin_count == 1
+
+
+def test_index_package_removes_missing_files(tmp_path):
+    repository_path = tmp_path/'pollination-dsl'
+    (repository_path/'plugins').mkdir(parents=True)
+    (repository_path/'recipes').mkdir()
+    index_path = repository_path/'index.json'
+
+    old_file = _package_plugin(repository_path, '0.1.0')
+    _index_package(repository_path, old_file, 'plugin')
+    old_file.unlink()
+
+    new_file = _package_plugin(repository_path, '0.2.0')
+    _index_package(repository_path, new_file, 'plugin')
+
+    index = RepositoryIndex.from_file(index_path.as_posix())
+    assert [v.tag for v in index.plugin['test-plugin']] == ['0.2.0']
+
+
+def test_index_package_invalid_index(tmp_path):
+    repository_path = tmp_path/'pollination-dsl'
+    (repository_path/'plugins').mkdir(parents=True)
+    (repository_path/'recipes').mkdir()
+    index_path = repository_path/'index.json'
+    index_path.write_text('{"plugin": ')
+
+    file_path = _package_plugin(repository_path, '0.1.0')
+    _index_package(repository_path, file_path, 'plugin')
+
+    index = RepositoryIndex.from_file(index_path.as_posix())
+    assert [v.tag for v in index.plugin['test-plugin']] == ['0.1.0']
@@ -0,0 +1,138 @@
+import sys
+import types
+from email.message import Message
+
+from pollination_dsl import common
+from pollination_dsl.common import _parse_package_data, _get_package_data, \
+    _get_module_package_data, _clear_metadata_cache
+
+
+def _package_metadata():
+    package_data = Message()
+    package_data['Metadata-Version'] = '2.1'
+    package_data['Name'] = 'pollination-honeybee-radiance'
+    package_data['Version'] = '0.1.2.dev1+gf910655.d20210207'
+    package_data['Summary'] = 'Honeybee Radiance plugin for Pollination.'
+    package_data['Home-page'] = \
+        'https://github.com/pollination/pollination-honeybee-radiance'
+    package_data['Author'] = 'ladybug-tools'
+    package_data['Maintainer'] = 'maintainer_1, maintainer_2'
+    package_data['Maintainer-email'] = \
+        'maintainer_1@example.com, maintainer_2@example.com'
+    package_data['License'] = 'MIT, https://opensource.org/licenses/MIT'
+    package_data['Keywords'] = 'honeybee, radiance, ladybug-tools'
+    package_data['Project-URL'] = 'icon, https://ladybug.tools/assets/icon.png'
+    package_data['Project-URL'] = \
+        'source, https://github.com/pollination/pollination-honeybee-radiance'
+    return package_data
+
+
+def test_parse_package_data():
+    data = _parse_package_data(_package_metadata())
+    assert data['name'] == 'honeybee-radiance'
+    assert data['description'] == 'Honeybee Radiance plugin for Pollination.'
+    assert data['home'] == \
+        'https://github.com/pollination/pollination-honeybee-radiance'
+    assert data['tag'] == '0.1.2'
+    assert data['keywords'] == ['honeybee', 'radiance', 'ladybug-tools']
+    assert data['maintainers'] == [
+        {'name': 'maintainer_1', 'email': 'maintainer_1@example.com'},
+        {'name': 'maintainer_2', 'email': 'maintainer_2@example.com'}
+    ]
+    assert data['license'] == {
+        'name': 'MIT', 'url': 'https://opensource.org/licenses/MIT'
+    }
+    assert data['icon'] == 'https://ladybug.tools/assets/icon.png'
+    assert data['sources'] == [
+        'https://github.com/pollination/pollination-honeybee-radiance'
+    ]
+
+
+def test_parse_package_data_minimal():
+    package_data = Message()
+    package_data['Name'] = 'pollination-daylight-factor'
+    package_data['Version'] = '0.1'
+    data = _parse_package_data(package_data)
+    assert data['name'] == 'daylight-factor'
+    assert data['tag'] == '0.1.0'
+    assert data['keywords'] is None
+    assert data['maintainers'] == []
+    assert data['license'] == {'name': None, 'url': None}
+    assert data['icon'] is None
+    assert data['sources'] == []
+
+
+def test_parse_package_data_urls():
+    package_data = Message()
+    package_data['Name'] = 'pollination-daylight-factor'
+    package_data['Version'] = '0.1.0'
+    package_data['License'] = 'PolyForm Shield License 1.0.0'
+    package_data['Project-URL'] = 'docs, https://example.com/docs?a=1,b=2'
+    package_data['Project-URL'] = 'https://example.com/no-label'
+    package_data['Project-URL'] = ' icon , https://example.com/icon.png'
+    data = _parse_package_data(package_data)
+    assert data['license'] == {'name': 'PolyForm Shield License 1.0.0', 'url': None}
+    assert data['icon'] == 'https://example.com/icon.png'
+    assert data['sources'] == ['https://example.com/docs?a=1,b=2']
+
+
+def test_module_package_data_cache(monkeypatch):
+    calls = []
+
+    def _package_data(package_name):
+        calls.append(package_name)
+        return {'name': 'test'}
+
+    monkeypatch.setattr(common, '_get_package_data', _package_data)
+    module = types.ModuleType('pollination.test_module_cache')
+    _clear_metadata_cache()
+    try:
+        assert _get_module_package_data(module) == {'name': 'test'}
+        assert _get_module_package_data(module) == {'name': 'test'}
+        assert calls == ['pollination.test_module_cache']
+        _clear_metadata_cache()
+        _get_module_package_data(module)
+        assert len(calls) == 2
+    finally:
+        _clear_metadata_cache()
+
+
+def test_load_package_data_cache(monkeypatch):
+    calls = []
+
+    def _dist_metadata(package_name):
+        calls.append(package_name)
+        return _package_metadata()
+
+    _clear_metadata_cache()
+    monkeypatch.setattr(common, '_dist_metadata', _dist_metadata)
+    try:
+        data = _get_package_data('pollination_honeybee_radiance')
+        assert data['tag'] == '0.1.2'
+        data['tag'] = '0.2.0'
+        assert _get_package_data('pollination_honeybee_radiance')['tag'] == '0.1.2'
+        assert calls == ['pollination_honeybee_radiance']
+    finally:
+        common._load_package_data.cache_clear()
+
+
+def test_package_copies_cached_data(monkeypatch):
+    package_data = _parse_package_data(_package_metadata())
+    monkeypatch.setattr(common, '_get_package_data', lambda name: package_data)
+    module = types.ModuleType('pollination.test_package_copy')
+    module.__pollination__ = {}
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+
+    class TestFunction(common._BaseClass):
+        pass
+
+    TestFunction.__module__ = 'pollination.test_package_copy.functions'
+    _clear_metadata_cache()
+    try:
+        info = TestFunction()._package
+        info['maintainers'].append({'name': 'someone', 'email': None})
+        info['license']['name'] = 'changed'
+        assert len(package_data['maintainers']) == 2
+        assert package_data['license']['name'] == 'MIT'
+    finally:
+        _clear_metadata_cache()
@@ -0,0 +1,21 @@
+from pollination_dsl.common import camel_to_snake, name_to_pollination
+
+
+def test_camel_to_snake():
+    assert camel_to_snake('CreateOctree') == 'create-octree'
+    assert camel_to_snake('createOctree') == 'create-octree'
+    assert camel_to_snake('DaylightFactorEntryPoint') == \
+        'daylight-factor-entry-point'
+
+
+def test_camel_to_snake_consecutive_capitals():
+    assert camel_to_snake('RunDFGrid') == 'run-d-f-grid'
+
+
+def test_name_to_pollination():
+    assert name_to_pollination('honeybee-radiance') == \
+        'pollination-honeybee-radiance'
+    assert name_to_pollination('pollination.honeybee_radiance') == \
+        'pollination-honeybee_radiance'
+    assert name_to_pollination('pollination_honeybee_radiance') == \
+        'pollination_honeybee_radiance'
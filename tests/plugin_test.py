@@ -0,0 +1,127 @@
+import importlib
+import textwrap
+
+from pollination_dsl import common
+from pollination_dsl.package import _load_plugin
+
+_FUNCTION = '''
+from dataclasses import dataclass
+from pollination_dsl.function import Function, command
+
+
+@dataclass
+class {name}(Function):
+    """{name} function."""
+
+    @command
+    def run(self):
+        return 'echo {name}'
+'''
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(content))
+
+
+def test_load_plugin_nested_function(monkeypatch, tmp_path):
+    package_name = 'pollination_plugin_test_nested'
+    package_folder = tmp_path/package_name
+    _write(
+        package_folder/'__init__.py',
+        "__pollination__ = {'config': {'docker': "
+        "{'image': 'ladybugtools/test:0.1.0', 'workdir': '/home/run'}}}\n"
+    )
+    _write(
+        package_folder/'funcs.py',
+        _FUNCTION.format(name='FirstFunction') +
+        '\n\nfrom .nested.impl import SecondFunction  # noqa: F401\n'
+    )
+    _write(package_folder/'nested'/'__init__.py', '')
+    _write(package_folder/'nested'/'impl.py', _FUNCTION.format(name='SecondFunction'))
+
+    monkeypatch.syspath_prepend(tmp_path.as_posix())
+    monkeypatch.setattr(
+        common, '_get_package_data',
+        lambda name: {'name': 'plugin-test-nested', 'tag': '0.1.0'}
+    )
+    common._clear_metadata_cache()
+    try:
+        module = importlib.import_module(package_name)
+        plugin = _load_plugin(module)
+    finally:
+        common._clear_metadata_cache()
+
+    assert sorted(func.name for func in plugin.functions) == \
+        ['first-function', 'second-function']
+
+
+def test_load_plugin_circular_imports(monkeypatch, tmp_path):
+    package_name = 'pollination_plugin_test_circular'
+    package_folder = tmp_path/package_name
+    _write(
+        package_folder/'__init__.py',
+        "__pollination__ = {'config': {'docker': "
+        "{'image': 'ladybugtools/test:0.1.0', 'workdir': '/home/run'}}}\n"
+    )
+    _write(
+        package_folder/'a.py',
+        _FUNCTION.format(name='FirstFunction') + '\n\nfrom .b import B  # noqa: F401\n'
+    )
+    _write(
+        package_folder/'b.py',
+        'from .a import FirstFunction  # noqa: F401\n' +
+        _FUNCTION.format(name='SecondFunction') + '\n\nB = 2\n'
+    )
+
+    monkeypatch.syspath_prepend(tmp_path.as_posix())
+    monkeypatch.setattr(
+        common, '_get_package_data',
+        lambda name: {'name': 'plugin-test-circular', 'tag': '0.1.0'}
+    )
+    common._clear_metadata_cache()
+    try:
+        module = importlib.import_module(package_name)
+        plugin = _load_plugin(module)
+    finally:
+        common._clear_metadata_cache()
+
+    assert sorted(func.name for func in plugin.functions) == \
+        ['first-function', 'second-function']
+
+
+def test_load_plugin_function_order(monkeypatch, tmp_path):
+    package_name = 'pollination_plugin_test_order'
+    package_folder = tmp_path/package_name
+    _write(
+        package_folder/'__init__.py',
+        "__pollination__ = {'config': {'docker': "
+        "{'image': 'ladybugtools/test:0.1.0', 'workdir': '/home/run'}}}\n"
+    )
+    _write(
+        package_folder/'funcs.py',
+        _FUNCTION.format(name='ZebraFunction') +
+        '\n\nfrom .nested.impl import AlphaFunction  # noqa: F401\n'
+        '\n\ndef _make_function():\n' +
+        textwrap.indent(_FUNCTION.format(name='DynamicFunction'), '    ') +
+        '\n    return DynamicFunction\n'
+        '\n\n_make_function()\n'
+    )
+    _write(package_folder/'nested'/'__init__.py', '')
+    _write(package_folder/'nested'/'impl.py', _FUNCTION.format(name='AlphaFunction'))
+
+    monkeypatch.syspath_prepend(tmp_path.as_posix())
+    monkeypatch.setattr(
+        common, '_get_package_data',
+        lambda name: {'name': 'plugin-test-order', 'tag': '0.1.0'}
+    )
+    common._clear_metadata_cache()
+    try:
+        module = importlib.import_module(package_name)
+        plugin = _load_plugin(module)
+    finally:
+        common._clear_metadata_cache()
+
+    # functions that are not module attributes are not packaged
+    assert [func.name for func in plugin.functions] == \
+        ['alpha-function', 'zebra-function']
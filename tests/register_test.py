@@ -0,0 +1,79 @@
+import json
+
+from pollination_dsl import package as dsl_package
+
+
+def _setup(monkeypatch, tmp_path, editable=False):
+    repository_path = tmp_path/'pollination-dsl'
+    (repository_path/'plugins').mkdir(parents=True)
+    key = ['0.1.0', 'digest-1']
+    calls = []
+
+    def _package(package_name):
+        calls.append(package_name)
+        file_path = repository_path/'plugins'/'test-plugin-0.1.0.tgz'
+        file_path.write_bytes(b'package')
+        index = {
+            'plugin': {
+                'test-plugin': [
+                    {'tag': '0.1.0', 'url': 'plugins/test-plugin-0.1.0.tgz'}
+                ]
+            },
+            'recipe': {}
+        }
+        (repository_path/'index.json').write_text(json.dumps(index))
+        return file_path
+
+    monkeypatch.setattr(dsl_package, '_init_repo', lambda: repository_path)
+    monkeypatch.setattr(dsl_package, 'package', _package)
+    monkeypatch.setattr(
+        dsl_package, '_installation_info', lambda name: (list(key), editable)
+    )
+    return repository_path, key, calls
+
+
+def test_autoregister(monkeypatch, tmp_path):
+    repository_path, key, calls = _setup(monkeypatch, tmp_path)
+    dsl_package._autoregister('test-plugin')
+    dsl_package._autoregister('test-plugin')
+    assert calls == ['test-plugin']
+
+    # package file is removed from the repository
+    (repository_path/'plugins'/'test-plugin-0.1.0.tgz').unlink()
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 2
+
+    # package is missing from the index
+    (repository_path/'index.json').write_text(json.dumps({'plugin': {}}))
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 3
+
+    # package is re-installed
+    key[1] = 'digest-2'
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 4
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 4
+
+    # pollination-dsl is upgraded
+    key[0] = '0.2.0'
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 5
+
+
+def test_autoregister_editable(monkeypatch, tmp_path):
+    _, _, calls = _setup(monkeypatch, tmp_path, editable=True)
+    dsl_package._autoregister('test-plugin')
+    dsl_package._autoregister('test-plugin')
+    assert len(calls) == 2
+
+
+def test_installation_info(monkeypatch):
+    key, editable = dsl_package._installation_info('packaging')
+    assert not editable
+    assert key == dsl_package._installation_info('packaging')[0]
+
+    monkeypatch.setattr(dsl_package, '_dsl_version', lambda: '999.0.0')
+    assert dsl_package._installation_info('packaging')[0] != key
+
+    assert dsl_package._installation_info('not-an-installed-package') == (None, False)
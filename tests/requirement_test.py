@@ -0,0 +1,59 @@
+import importlib_metadata
+import pytest
+
+from pollination_dsl.common import get_requirement_version, \
+    get_docker_image_from_dependency
+
+
+def _requires(package_name):
+    return [
+        'pollination-dsl (==0.9.0)',
+        'honeybee-radiance==1.28.12',
+        'honeybee_energy>=1.8.0,<2.0',
+        'queenbee-luigi (>=0.2.0) ; extra == "cli"',
+        'honeybee-radiance[cli]==1.30.0; extra == "cli"'
+    ]
+
+
+def test_requirement_version(monkeypatch):
+    monkeypatch.setattr(importlib_metadata, 'requires', _requires)
+    get_requirement_version.cache_clear()
+    try:
+        assert get_requirement_version('pollination-test', 'pollination-dsl') == \
+            '0.9.0'
+        assert get_requirement_version('pollination-test', 'honeybee_energy') == \
+            '1.8.0'
+        assert get_requirement_version('pollination-test', 'queenbee-luigi') == \
+            '0.2.0'
+        assert get_requirement_version('pollination-test', 'honeybee-radiance') == \
+            '1.28.12'
+    finally:
+        get_requirement_version.cache_clear()
+
+
+def test_docker_image_from_dependency(monkeypatch):
+    monkeypatch.setattr(importlib_metadata, 'requires', _requires)
+    get_requirement_version.cache_clear()
+    get_docker_image_from_dependency.cache_clear()
+    try:
+        assert get_docker_image_from_dependency(
+            'pollination-test', 'honeybee-radiance', 'ladybugtools'
+        ) == 'ladybugtools/honeybee-radiance:1.28.12'
+        with pytest.warns(UserWarning):
+            image = get_docker_image_from_dependency(
+                'pollination-test', 'ladybug-core', 'ladybugtools', 'ladybug'
+            )
+        assert image == 'ladybugtools/ladybug:latest'
+    finally:
+        get_requirement_version.cache_clear()
+        get_docker_image_from_dependency.cache_clear()
+
+
+def test_missing_requirement(monkeypatch):
+    monkeypatch.setattr(importlib_metadata, 'requires', _requires)
+    get_requirement_version.cache_clear()
+    try:
+        with pytest.raises(KeyError):
+            get_requirement_version('pollination-test', 'ladybug-core')
+    finally:
+        get_requirement_version.cache_clear()
@@ -17,3 +17,15 @@ def test_version():
     v = '0.1.2'
     version = _clean_version(v)
     assert version == '0.1.2'
+
+
+def test_short_version():
+    v = '0.1'
+    version = _clean_version(v)
+    assert version == '0.1.0'
+
+
+def test_pre_release_version():
+    v = '1.2.3rc1'
+    version = _clean_version(v)
+    assert version == '1.2.3'